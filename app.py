@@ -1,7 +1,11 @@
+# Настройки OCR импортируются первыми: OMP_THREAD_LIMIT должен быть задан до загрузки libtesseract
+from modules.ocr_config import TESSERACT_CONFIG, TESSERACT_LANG, tesserocr, create_tesseract_api
 import streamlit as st
 import pandas as pd
 import tempfile
 import os
+import queue
+import threading
 from PIL import Image
 import pytesseract
 import cv2
@@ -21,43 +25,155 @@ st.set_page_config(
 class SimpleOCR:
     def __init__(self):
         self.table_extractor = TableExtractor()
+        # CLAHE создаётся один раз на поток: объект не рассчитан на одновременное
+        # использование, а preprocess_image вызывается из фоновых потоков
+        self._local = threading.local()
+        # Постоянные экземпляры Tesseract: языковые данные загружаются один раз,
+        # а не при каждом запуске процесса tesseract. PyTessBaseAPI не потокобезопасен,
+        # поэтому каждый поток берёт свободный экземпляр из пула и возвращает его
+        self._apis = []
+        self._idle_apis = queue.SimpleQueue()
     
-    def extract_text_from_image(self, image):
-        """Извлекает текст из изображения"""
+    def __del__(self):
+        for api in getattr(self, '_apis', []):
+            api.End()
+    
+    def _recognize(self, image):
+        """Распознаёт подготовленное изображение"""
+        if tesserocr is None:
+            return pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG)
+        
+        try:
+            api = self._idle_apis.get_nowait()
+        except queue.Empty:
+            api = create_tesseract_api()
+            self._apis.append(api)
+        try:
+            api.SetImage(Image.fromarray(image))
+            return api.GetUTF8Text()
+        finally:
+            self._idle_apis.put(api)
+    
+    def _get_clahe(self):
+        """Возвращает объект CLAHE текущего потока"""
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        return clahe
+    
+    def preprocess_image(self, image):
+        """Подготавливает изображение к OCR: оттенки серого, масштаб, контраст, бинаризация"""
+        # Конвертируем в numpy array
+        img_array = np.array(image)
+        
+        # Конвертируем в градации серого
+        if len(img_array.shape) == 3:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = img_array
+        
+        # Уменьшаем крупные фото: короткая сторона около 1500px
+        # (примерно 300dpi) достаточна для OCR
+        short_side = min(gray.shape[:2])
+        if short_side > 1500:
+            scale = 1500 / short_side
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        # Улучшаем контраст, если он недостаточен: у чистых сканов и скриншотов
+        # гистограмма уже широкая (std > 60), а маленькие превью не стоят затрат
+        if gray.shape[0] * gray.shape[1] < 200_000 or gray.std() > 60:
+            enhanced = gray
+        else:
+            enhanced = self._get_clahe().apply(gray)
+        
+        # Бинаризация Оцу и лёгкое сглаживание: tesseract получает
+        # чистое изображение и не выполняет собственную пороговую обработку
+        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return cv2.GaussianBlur(binary, (3, 3), 0)
+    
+    def extract_text(self, prepared):
+        """Распознаёт текст на изображении, подготовленном preprocess_image"""
         try:
-            # Конвертируем в numpy array
-            img_array = np.array(image)
-            
-            # Конвертируем в градации серого
-            if len(img_array.shape) == 3:
-                gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = img_array
-            
-            # Улучшаем контраст
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(gray)
-            
             # OCR с русским языком
-            text = pytesseract.image_to_string(enhanced, lang='rus+eng')
-            return text
+            return self._recognize(prepared)
         except Exception as e:
-            st.error(f"Ошибка OCR: {e}")
-            return ""
+            # st.error нельзя вызывать из рабочего потока — сообщение выводит main()
+            raise RuntimeError(f"Ошибка OCR: {e}") from e
     
-    def process_image(self, image):
-        """Обрабатывает изображение и возвращает структурированные данные"""
-        text = self.extract_text_from_image(image)
+    def extract_text_from_image(self, image):
+        """Извлекает текст из изображения"""
+        return self.extract_text(self.preprocess_image(image))
+    
+    def process_prepared(self, prepared):
+        """Распознаёт подготовленное изображение и возвращает структурированные данные"""
+        text = self.extract_text(prepared)
         if text.strip():
             return self.table_extractor.extract_from_text(text)
-        return []
+        return self.table_extractor.empty_columns()
+    
+    def process_image(self, image):
+        """Обрабатывает изображение и возвращает структурированные данные"""
+        return self.process_prepared(self.preprocess_image(image))
 
 def resize_image_if_needed(image, max_size=(2000, 2000)):
     """Уменьшает размер изображения если необходимо"""
-    if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    width, height = image.size
+    if width > max_size[0] or height > max_size[1]:
+        # Сохраняем пропорции, как Image.thumbnail
+        scale = min(max_size[0] / width, max_size[1] / height)
+        new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        
+        # cv2.resize с INTER_AREA заметно быстрее LANCZOS и достаточен для OCR
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            image = image.convert('RGB')
+        resized = cv2.resize(np.asarray(image), new_size, interpolation=cv2.INTER_AREA)
+        image = Image.fromarray(resized)
     return image
 
+def iter_ocr_results(ocr, uploaded_files, workers=None):
+    """
+    Распознаёт файлы конвейером: поток подготовки открывает и обрабатывает
+    следующий файл, пока потоки OCR распознают предыдущие.
+    Возвращает кортежи (индекс файла, результаты, ошибка) по мере готовности.
+    """
+    workers = workers or os.cpu_count() or 1
+    q_pre = queue.Queue(maxsize=workers * 2)
+    q_out = queue.Queue()
+    
+    def preprocess_worker():
+        for i, uploaded_file in enumerate(uploaded_files):
+            try:
+                image = resize_image_if_needed(Image.open(uploaded_file))
+                q_pre.put((i, ocr.preprocess_image(image)))
+            except Exception as e:
+                q_out.put((i, None, e))
+        
+        # Сигнал завершения для каждого потока OCR
+        for _ in range(workers):
+            q_pre.put(None)
+    
+    def ocr_worker():
+        # Tesseract работает в отдельном процессе или отпускает GIL,
+        # поэтому несколько потоков OCR выполняются параллельно
+        while True:
+            item = q_pre.get()
+            if item is None:
+                return
+            
+            i, prepared = item
+            try:
+                q_out.put((i, ocr.process_prepared(prepared), None))
+            except Exception as e:
+                q_out.put((i, None, e))
+    
+    threads = [threading.Thread(target=preprocess_worker, daemon=True)]
+    threads += [threading.Thread(target=ocr_worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    
+    for _ in uploaded_files:
+        yield q_out.get()
+
 def main():
     st.title("📄 Приложение для распознавания текста")
     st.markdown("Извлечение данных из изображений и PDF с помощью OCR")
@@ -112,34 +228,36 @@ def main():
         st.header("🔍 Обработка")
         
         if uploaded_files and st.button("🚀 Начать обработку", type="primary"):
-            all_results = []
+            all_results = TableExtractor.empty_columns()
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for i, uploaded_file in enumerate(uploaded_files):
-                status_text.text(f"Обрабатывается {uploaded_file.name}...")
-                
-                try:
-                    # Открываем и оптимизируем изображение
-                    image = Image.open(uploaded_file)
-                    image = resize_image_if_needed(image)
-                    
-                    # Обрабатываем изображение
-                    results = st.session_state.ocr.process_image(image)
-                    all_results.extend(results)
-                
-                except Exception as e:
-                    st.error(f"Ошибка при обработке {uploaded_file.name}: {e}")
+            status_text.text(f"Обрабатывается файлов: {len(uploaded_files)}...")
+            
+            # Подготовка следующих файлов идёт параллельно с распознаванием текущих
+            results_by_file = [None for _ in uploaded_files]
+            ocr_results = iter_ocr_results(st.session_state.ocr, uploaded_files)
+            for done, (i, results, error) in enumerate(ocr_results, start=1):
+                if error is not None:
+                    st.error(f"Ошибка при обработке {uploaded_files[i].name}: {error}")
+                else:
+                    results_by_file[i] = results
                 
-                progress_bar.progress((i + 1) / len(uploaded_files))
+                progress_bar.progress(done / len(uploaded_files))
+            
+            # Результаты собираем в порядке загрузки файлов
+            for results in results_by_file:
+                if results is not None:
+                    TableExtractor.extend_columns(all_results, results)
             
             status_text.text("Обработка завершена!")
             
             # Показываем результаты
-            if all_results:
-                st.success(f"Найдено позиций: {len(all_results)}")
+            found_count = len(all_results['Артикул'])
+            if found_count:
+                st.success(f"Найдено позиций: {found_count}")
                 
-                # Создаем DataFrame
+                # Создаем DataFrame сразу из колонок
                 df = pd.DataFrame(all_results)
                 
                 # Статистика
@@ -1,7 +1,8 @@
 import pandas as pd
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 from io import BytesIO
 
 class ExcelExporter:
@@ -10,57 +11,34 @@ class ExcelExporter:
         self.header_font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
         self.header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
         self.cell_font = Font(name='Arial', size=10)
+        self.subheader_font = Font(name='Arial', size=11, bold=True)
         self.border = Border(
             left=Side(border_style='thin'),
             right=Side(border_style='thin'),
             top=Side(border_style='thin'),
             bottom=Side(border_style='thin')
         )
+        # Выравнивания создаются один раз и переиспользуются для всех ячеек
+        self._align_center = Alignment(horizontal='center', vertical='center')
+        self._align_left = Alignment(horizontal='left')
+        self._align_center_h = Alignment(horizontal='center')
+        # Артикул и Количество по центру, Наименование по левому краю
+        self._column_alignments = [self._align_center_h, self._align_left, self._align_center_h]
         
     def create_excel_download(self, dataframe):
         """Создает Excel файл для скачивания в Streamlit"""
         output = BytesIO()
         
-        # Создаем workbook
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Записываем основные данные
-            dataframe.to_excel(writer, index=False, sheet_name='Данные')
-            
-            # Получаем worksheet для форматирования
-            workbook = writer.book
-            worksheet = writer.sheets['Данные']
-            
-            # Применяем стили
-            self._apply_styles(worksheet, len(dataframe))
-            
-            # Автоматическая ширина колонок
-            self._auto_adjust_column_width(worksheet)
-            
-            # Добавляем лист со статистикой
-            self._add_statistics_sheet(workbook, dataframe)
-        
-        output.seek(0)
+        # Создаем workbook и сохраняем в память
+        workbook = self._build_workbook(dataframe, 'Данные')
+        workbook.save(output)
+        
         return output.getvalue()
     
     def export_to_excel(self, dataframe, filename="extracted_data.xlsx"):
         """Экспортирует DataFrame в Excel файл (для локального сохранения)"""
         # Создаем workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Извлеченные данные"
-        
-        # Добавляем данные
-        for r in dataframe_to_rows(dataframe, index=False, header=True):
-            ws.append(r)
-        
-        # Применяем стили
-        self._apply_styles(ws, len(dataframe))
-        
-        # Автоматическая ширина колонок
-        self._auto_adjust_column_width(ws)
-        
-        # Добавляем лист со статистикой
-        self._add_statistics_sheet(wb, dataframe)
+        wb = self._build_workbook(dataframe, "Извлеченные данные")
         
         # Сохраняем файл
         wb.save(filename)
@@ -68,88 +46,113 @@ class ExcelExporter:
         
         return filename
     
-    def _apply_styles(self, worksheet, row_count):
-        """Применяет стили к таблице"""
-        # Стили для заголовков
-        for cell in worksheet[1]:
-            cell.font = self.header_font
-            cell.fill = self.header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = self.border
-        
-        # Стили для данных
-        for row_num in range(2, row_count + 2):
-            for col_num in range(1, 4):  # 3 колонки
-                cell = worksheet.cell(row=row_num, column=col_num)
-                cell.font = self.cell_font
-                cell.border = self.border
-                
-                # Выравнивание
-                if col_num == 1:  # Артикул
-                    cell.alignment = Alignment(horizontal='center')
-                elif col_num == 2:  # Наименование
-                    cell.alignment = Alignment(horizontal='left')
-                else:  # Количество
-                    cell.alignment = Alignment(horizontal='center')
+    def _build_workbook(self, dataframe, sheet_title):
+        """
+        Создает workbook в режиме write_only: строки сразу сериализуются в XML,
+        а стили назначаются ячейкам при создании, без повторного обхода листа.
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_title)
+        
+        # Пустые значения pandas записываем как пустые ячейки
+        data = dataframe.astype(object).where(dataframe.notna(), None)
+        header = list(data.columns)
+        
+        # Ширину колонок нужно задать до записи первой строки
+        for col_num, width in enumerate(self._widths_from_df(dataframe), start=1):
+            worksheet.column_dimensions[get_column_letter(col_num)].width = width
+        
+        # Заголовки
+        worksheet.append([
+            self._styled_cell(worksheet, value, self.header_font, self.header_fill, self._align_center)
+            for value in header
+        ])
+        
+        # Данные
+        alignments = self._column_alignments
+        for row in data.itertuples(index=False):
+            worksheet.append([
+                self._styled_cell(worksheet, value, self.cell_font,
+                                  alignment=alignments[i] if i < len(alignments) else None)
+                for i, value in enumerate(row)
+            ])
+        
+        # Добавляем лист со статистикой
+        self._add_statistics_sheet(workbook, dataframe)
+        
+        return workbook
+    
+    def _styled_cell(self, worksheet, value, font, fill=None, alignment=None):
+        """Создает ячейку write_only листа с рамкой и заданными стилями"""
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.font = font
+        cell.border = self.border
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
     
-    def _auto_adjust_column_width(self, worksheet):
-        """Автоматически настраивает ширину колонок"""
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            
+    def _widths_from_df(self, dataframe):
+        """Вычисляет ширину колонок по DataFrame векторными строковыми операциями pandas"""
+        widths = []
+        for column in dataframe.columns:
+            lengths = dataframe[column].fillna('').astype(str).str.len()
+            max_length = max(int(lengths.max()) if len(lengths) else 0, len(str(column)))
+            widths.append(min(max_length + 2, 50))  # Максимум 50 символов
+        return widths
+    
+    def _auto_adjust_column_width(self, worksheet, rows):
+        """Автоматически настраивает ширину колонок по значениям строк"""
+        widths = {}
+        for row in rows:
+            for col_num, value in enumerate(row, start=1):
+                length = len(str(value)) if value is not None else 0
+                widths[col_num] = max(widths.get(col_num, 0), length)
+        
+        for col_num, max_length in widths.items():
             adjusted_width = min(max_length + 2, 50)  # Максимум 50 символов
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+            worksheet.column_dimensions[get_column_letter(col_num)].width = adjusted_width
     
     def _add_statistics_sheet(self, workbook, dataframe):
         """Добавляет лист со статистикой"""
         stats_sheet = workbook.create_sheet(title="Статистика")
         
+        # Маски заполненных значений считаются один раз на колонку
+        articles = dataframe['Артикул']
+        article_mask = articles != ''
+        filled_articles = articles[article_mask]
+        
         # Общая статистика
         stats = [
             ["Показатель", "Значение"],
             ["Всего позиций", len(dataframe)],
-            ["Уникальных артикулов", dataframe['Артикул'].nunique()],
-            ["Позиций с артикулами", len(dataframe[dataframe['Артикул'] != ''])],
-            ["Позиций с наименованиями", len(dataframe[dataframe['Наименование'] != ''])],
-            ["Позиций с количеством", len(dataframe[dataframe['Количество'] != ''])],
+            ["Уникальных артикулов", filled_articles.nunique()],
+            ["Позиций с артикулами", int(article_mask.sum())],
+            ["Позиций с наименованиями", int((dataframe['Наименование'] != '').sum())],
+            ["Позиций с количеством", int((dataframe['Количество'] != '').sum())],
             ["", ""],
             ["Топ артикулы", ""],
         ]
         
         # Добавляем топ артикулы
-        top_articles = dataframe[dataframe['Артикул'] != '']['Артикул'].value_counts().head(5)
+        top_articles = filled_articles.value_counts().head(5)
         for article, count in top_articles.items():
             stats.append([f"  {article}", f"{count} раз"])
         
-        # Записываем статистику
-        for row in stats:
-            stats_sheet.append(row)
-        
-        # Применяем стили к статистике
-        for row_num in range(1, len(stats) + 1):
-            for col_num in range(1, 3):
-                cell = stats_sheet.cell(row=row_num, column=col_num)
-                cell.border = self.border
-                
-                if row_num == 1:  # Заголовок
-                    cell.font = self.header_font
-                    cell.fill = self.header_fill
-                    cell.alignment = Alignment(horizontal='center')
-                elif row_num == 8:  # Подзаголовок "Топ артикулы"
-                    cell.font = Font(name='Arial', size=11, bold=True)
-                else:
-                    cell.font = self.cell_font
-        
         # Автоматическая ширина колонок для статистики
-        self._auto_adjust_column_width(stats_sheet)
+        self._auto_adjust_column_width(stats_sheet, stats)
+        
+        # Записываем статистику со стилями
+        for row_num, row in enumerate(stats, start=1):
+            if row_num == 1:  # Заголовок
+                cells = [self._styled_cell(stats_sheet, value, self.header_font, self.header_fill,
+                                           self._align_center_h) for value in row]
+            elif row_num == 8:  # Подзаголовок "Топ артикулы"
+                cells = [self._styled_cell(stats_sheet, value, self.subheader_font) for value in row]
+            else:
+                cells = [self._styled_cell(stats_sheet, value, self.cell_font) for value in row]
+            stats_sheet.append(cells)
     
     def export_sample_data(self):
         """Создает пример данных для тестирования"""
@@ -0,0 +1,26 @@
+import os
+
+# Общие настройки Tesseract для app.py и PDFProcessor.
+# Модуль нужно импортировать раньше всего, что загружает libtesseract:
+# OMP_THREAD_LIMIT читается при загрузке библиотеки.
+
+# Изображения и страницы распознаются параллельно (потоки в app.py, процессы
+# в PDFProcessor), поэтому внутренняя многопоточность OpenMP у каждого
+# экземпляра tesseract только мешает
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+TESSERACT_LANG = 'rus+eng'
+
+# Один блок текста без анализа разметки, только LSTM-движок (без legacy)
+TESSERACT_CONFIG = '--psm 6 --oem 1'
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr не установлен — работаем через pytesseract
+    tesserocr = None
+
+
+def create_tesseract_api():
+    """Создает постоянный экземпляр tesserocr с теми же настройками, что и TESSERACT_CONFIG"""
+    return tesserocr.PyTessBaseAPI(lang=TESSERACT_LANG, psm=tesserocr.PSM.SINGLE_BLOCK,
+                                   oem=tesserocr.OEM.LSTM_ONLY)
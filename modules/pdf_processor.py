@@ -1,11 +1,52 @@
+# Настройки OCR импортируются первыми: OMP_THREAD_LIMIT должен быть задан до загрузки libtesseract
+from modules.ocr_config import TESSERACT_CONFIG, TESSERACT_LANG, tesserocr, create_tesseract_api
+import os
 import pdfplumber
 import pytesseract
 import fitz  # PyMuPDF
 from PIL import Image
-import io
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from modules.table_extractor import TableExtractor
 
+# Постоянный экземпляр Tesseract в процессе-обработчике пула
+_api = None
+
+
+def _init_ocr_worker():
+    """Загружает языковые данные Tesseract один раз на процесс пула"""
+    global _api
+    if tesserocr is not None:
+        _api = create_tesseract_api()
+
+
+def _ocr_one_page(pdf_path, page_num):
+    """
+    Рендерит одну страницу PDF и выполняет OCR.
+    Функция верхнего уровня, чтобы её можно было передать в пул процессов.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc[page_num]
+        # Масштабируем для улучшения качества OCR
+        zoom = 2.0
+        mat = fitz.Matrix(zoom, zoom)
+        pix = page.get_pixmap(matrix=mat)
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # убираем альфа-канал
+        # Передаём сырой RGB-буфер в PIL напрямую, без кодирования в PNG
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    finally:
+        doc.close()
+
+    # Выполняем OCR (русский+английский)
+    if _api is not None:
+        _api.SetImage(image)
+        return _api.GetUTF8Text()
+    return pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG)
+
+
 class PDFProcessor:
     def __init__(self):
         self.table_extractor = TableExtractor()
@@ -15,9 +56,9 @@ class PDFProcessor:
         Извлекает данные из PDF файла.
         Пытается сначала получить таблицы и текст напрямую с помощью pdfplumber.
         Если данных мало, конвертирует страницы в изображения и запускает OCR (pytesseract).
-        В итоге возвращает список словарей с ключами: Артикул, Наименование, Количество.
+        В итоге возвращает словарь колонок Артикул, Наименование, Количество со списками значений.
         """
-        results = []
+        results = self.table_extractor.empty_columns()
 
         # Попытка прямого извлечения таблиц и текста
         try:
@@ -26,47 +67,52 @@ class PDFProcessor:
                     tables = page.extract_tables()
                     for table in tables:
                         table_data = self.table_extractor.extract_from_table(table)
-                        results.extend(table_data)
+                        self.table_extractor.extend_columns(results, table_data)
 
                     # Если на странице нет таблиц, пытаемся извлечь текст и распарсить
                     if not tables:
                         text = page.extract_text() or ''
                         text_data = self.table_extractor.extract_from_text(text)
-                        results.extend(text_data)
+                        self.table_extractor.extend_columns(results, text_data)
         except Exception as e:
             print(f"Ошибка при извлечении с помощью pdfplumber: {e}")
 
         # Если данных мало, используем OCR
-        if len(results) < 3:
+        if len(results['Артикул']) < 3:
             ocr_results = self._extract_with_ocr(pdf_path)
-            results.extend(ocr_results)
+            self.table_extractor.extend_columns(results, ocr_results)
 
         return results
 
     def _extract_with_ocr(self, pdf_path):
         """
-        Конвертирует каждую страницу PDF в изображение и выполняет OCR с pytesseract,
-        затем извлекает структурированные данные из распознанного текста.
+        Конвертирует каждую страницу PDF в изображение и выполняет OCR с pytesseract
+        параллельно в пуле процессов, затем извлекает структурированные данные
+        из распознанного текста.
         """
-        results = []
+        results = self.table_extractor.empty_columns()
         try:
-            doc = fitz.open(pdf_path)
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                # Масштабируем для улучшения качества OCR
-                zoom = 2.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat)
-                img_bytes = pix.tobytes("png")
-                image = Image.open(io.BytesIO(img_bytes))
-
-                # Выполняем OCR (русский+английский)
-                text = pytesseract.image_to_string(image, lang='rus+eng', config='--psm 6')
-                page_results = self.table_extractor.extract_from_text(text)
-                results.extend(page_results)
-
-            doc.close()
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+
+            if page_count <= 1:
+                # Для одной страницы запуск пула и загрузка Tesseract в нём дороже самого OCR
+                texts = [_ocr_one_page(pdf_path, page_num) for page_num in range(page_count)]
+                self._extend_from_texts(results, texts)
+            else:
+                # Страницы распознаются параллельно, порядок результатов сохраняется.
+                # Процессов не больше, чем страниц: каждый загружает языковые данные
+                max_workers = min(page_count, os.cpu_count() or 1)
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_ocr_worker) as executor:
+                    texts = executor.map(partial(_ocr_one_page, pdf_path), range(page_count))
+                    self._extend_from_texts(results, texts)
         except Exception as e:
             print(f"Ошибка OCR при обработке PDF: {e}")
 
-        return results
\ No newline at end of file
+        return results
+
+    def _extend_from_texts(self, results, texts):
+        """Извлекает данные из распознанного текста страниц и дописывает их в results"""
+        for text in texts:
+            page_results = self.table_extractor.extract_from_text(text)
+            self.table_extractor.extend_columns(results, page_results)
\ No newline at end of file
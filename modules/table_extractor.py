@@ -3,29 +3,71 @@ import pandas as pd
 from typing import List, Dict
 
 class TableExtractor:
+    # Колонки результата: данные хранятся по колонкам (словарь списков),
+    # чтобы DataFrame строился сразу из списков, без разбора списка словарей
+    COLUMNS = ('Артикул', 'Наименование', 'Количество')
+    
+    # Слова, по которым распознаются строки заголовков и строки с товарами
+    HEADER_WORDS = ('артикул', 'наименование', 'количество', 'товар', 'позиция')
+    PRODUCT_KEYWORDS = (
+        'болт', 'гайка', 'винт', 'шайба', 'дюбель', 'саморез', 'скоба',
+        'крепеж', 'метиз', 'деталь', 'запчасть', 'изделие'
+    )
+    # Слова для поиска заголовков таблиц и определения колонок
+    TABLE_HEADER_WORDS = ('артикул', 'наименование', 'количество', 'код', 'название', 'кол-во', 'товар')
+    ARTICLE_COLUMN_WORDS = ('артикул', 'код')
+    NAME_COLUMN_WORDS = ('наименование', 'название', 'товар')
+    QUANTITY_COLUMN_WORDS = ('количество', 'кол-во', 'штук')
+    
     def __init__(self):
         # Паттерны для поиска артикулов, наименований и количества
-        self.patterns = {
-            'article': [
-                r'[A-Za-z0-9]{1,3}[-_]?\d{2,4}[-_]?[A-Za-z]{0,5}',  # A001-2024, B152-ST
-                r'[A-Z]\d{2,4}',  # A001, B152
-                r'\d{3,6}[-_][A-Za-z]{2,6}',  # 001-PRO
-                r'[A-Za-z]{1,2}\d{3,4}[-_]?[A-Za-z]*'  # AB123-XX
-            ],
-            'quantity': [
-                r'\d+\s*шт\.?',
-                r'\d+\s*штук',
-                r'\d+\s*единиц?',
-                r'\d+\s*[мкгт]г',
-                r'\d+\s*л',
-                r'\d+\s*кг',
-                r'\d+\s*м'
-            ]
-        }
+        # (компилируются один раз, так как вызываются для каждой строки OCR).
+        # Порядок важен: если совпадение паттерна отброшено фильтром,
+        # проверяется следующий паттерн, поэтому в одну альтернативу их не объединяем
+        self._article_res = [re.compile(p) for p in [
+            r'[A-Za-z0-9]{1,3}[-_]?\d{2,4}[-_]?[A-Za-z]{0,5}',  # A001-2024, B152-ST
+            r'[A-Z]\d{2,4}',  # A001, B152
+            r'\d{3,6}[-_][A-Za-z]{2,6}',  # 001-PRO
+            r'[A-Za-z]{1,2}\d{3,4}[-_]?[A-Za-z]*'  # AB123-XX
+        ]]
+        self._quantity_res = [re.compile(p, re.IGNORECASE) for p in [
+            r'\d+\s*шт\.?',
+            r'\d+\s*штук',
+            r'\d+\s*единиц?',
+            r'\d+\s*[мкгт]г',
+            r'\d+\s*л',
+            r'\d+\s*кг',
+            r'\d+\s*м'
+        ]]
+        self._num_end_re = re.compile(r'\b\d+\s*$')
+        self._ws_re = re.compile(r'\s+')
+        self._leading_num_re = re.compile(r'^\d+\s*\.?\s*')
+        self._digit_re = re.compile(r'\d')
+        
+        # Ключевые слова заголовков и товаров: все слова ищутся за один проход
+        self._header_kw_re = self._compile_keywords(self.HEADER_WORDS)
+        self._product_kw_re = self._compile_keywords(self.PRODUCT_KEYWORDS)
+    
+    @classmethod
+    def empty_columns(cls):
+        """Возвращает пустой результат: словарь колонок с пустыми списками"""
+        return {column: [] for column in cls.COLUMNS}
+    
+    @staticmethod
+    def extend_columns(target, source):
+        """Дописывает значения колонок source в конец колонок target"""
+        for column, values in source.items():
+            target[column].extend(values)
+        return target
+    
+    @staticmethod
+    def _compile_keywords(keywords):
+        """Собирает регулярное выражение, находящее любое из ключевых слов"""
+        return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
     
     def extract_from_text(self, text):
         """Извлекает структурированные данные из неструктурированного текста"""
-        results = []
+        articles, names, quantities = [], [], []
         
         # Разбиваем текст на строки
         lines = text.split('\n')
@@ -35,44 +77,46 @@ class TableExtractor:
             if not line or len(line) < 3:
                 continue
             
+            line_lower = line.lower()
+            
             # Пропускаем строки с заголовками
-            if any(word in line.lower() for word in ['артикул', 'наименование', 'количество', 'товар', 'позиция']):
+            if self._header_kw_re.search(line_lower):
                 continue
                 
-            # Ищем паттерны в строке
-            article = self._extract_article(line)
-            quantity = self._extract_quantity(line)
-            
-            # Если найден хотя бы артикул или количество
-            if article or quantity or self._looks_like_product_line(line):
-                # Определяем наименование (все, что не артикул и не количество)
-                name = self._extract_name(line, article, quantity)
+            # Ищем паттерны в строке. Артикул и количество всегда содержат цифру,
+            # поэтому строки без цифр проверяем только на ключевые слова товаров
+            if self._digit_re.search(line):
+                article = self._extract_article(line)
+                quantity = self._extract_quantity(line)
                 
-                # Добавляем только если есть содержательная информация
-                if article or (name and len(name) > 2):
-                    results.append({
-                        'Артикул': article,
-                        'Наименование': name,
-                        'Количество': quantity
-                    })
+                # Нужен хотя бы артикул, количество или слово, характерное для товара
+                if not (article or quantity or self._looks_like_product_line(line_lower)):
+                    continue
+            elif self._looks_like_product_line(line_lower):
+                article = quantity = ''
+            else:
+                continue
+            
+            # Определяем наименование (все, что не артикул и не количество)
+            name = self._extract_name(line, article, quantity)
+            
+            # Добавляем только если есть содержательная информация
+            if article or (name and len(name) > 2):
+                articles.append(article)
+                names.append(name)
+                quantities.append(quantity)
         
-        return results
+        return {'Артикул': articles, 'Наименование': names, 'Количество': quantities}
     
-    def _looks_like_product_line(self, line):
-        """Проверяет, похожа ли строка на описание товара"""
+    def _looks_like_product_line(self, line_lower):
+        """Проверяет, похожа ли строка (уже в нижнем регистре) на описание товара"""
         # Ищем характерные слова для товаров
-        product_keywords = [
-            'болт', 'гайка', 'винт', 'шайба', 'дюбель', 'саморез', 'скоба',
-            'крепеж', 'метиз', 'деталь', 'запчасть', 'изделие'
-        ]
-        
-        line_lower = line.lower()
-        return any(keyword in line_lower for keyword in product_keywords)
+        return self._product_kw_re.search(line_lower) is not None
     
     def _extract_article(self, text):
         """Извлекает артикул из текста"""
-        for pattern in self.patterns['article']:
-            match = re.search(pattern, text)
+        for pattern in self._article_res:
+            match = pattern.search(text)
             if match:
                 candidate = match.group().strip()
                 # Проверяем, что это не просто число (год, размер и т.д.)
@@ -82,13 +126,13 @@ class TableExtractor:
     
     def _extract_quantity(self, text):
         """Извлекает количество из текста"""
-        for pattern in self.patterns['quantity']:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in self._quantity_res:
+            match = pattern.search(text)
             if match:
                 return match.group().strip()
         
         # Дополнительный поиск просто чисел в конце строки
-        number_at_end = re.search(r'\b\d+\s*$', text)
+        number_at_end = self._num_end_re.search(text)
         if number_at_end:
             return number_at_end.group().strip() + ' шт'
             
@@ -106,11 +150,11 @@ class TableExtractor:
             name = name.replace(quantity, '')
         
         # Убираем лишние пробелы и символы
-        name = re.sub(r'\s+', ' ', name).strip()
+        name = self._ws_re.sub(' ', name).strip()
         name = name.strip('.,;:-_|')
         
         # Убираем начальные цифры (номера строк)
-        name = re.sub(r'^\d+\s*\.?\s*', '', name)
+        name = self._leading_num_re.sub('', name)
         
         # Убираем очень короткие наименования
         if len(name) < 3:
@@ -120,7 +164,7 @@ class TableExtractor:
     
     def extract_from_table(self, table):
         """Извлекает данные из таблицы (список списков)"""
-        results = []
+        results = self.empty_columns()
         
         if not table or len(table) < 2:
             return results
@@ -141,21 +185,20 @@ class TableExtractor:
                 
             row_data = self._extract_row_data(row, col_indices)
             if row_data:
-                results.append(row_data)
+                for column in self.COLUMNS:
+                    results[column].append(row_data[column])
         
         return results
     
     def _find_header_row(self, table):
         """Находит строку с заголовками"""
-        keywords = ['артикул', 'наименование', 'количество', 'код', 'название', 'кол-во', 'товар']
-        
         for i, row in enumerate(table):
             if not row:
                 continue
                 
             row_text = ' '.join(str(cell).lower() for cell in row if cell)
             
-            matches = sum(1 for keyword in keywords if keyword in row_text)
+            matches = sum(1 for keyword in self.TABLE_HEADER_WORDS if keyword in row_text)
             if matches >= 2:
                 return i
         
@@ -171,11 +214,11 @@ class TableExtractor:
                 
             cell_lower = str(cell).lower()
             
-            if any(word in cell_lower for word in ['артикул', 'код']):
+            if any(word in cell_lower for word in self.ARTICLE_COLUMN_WORDS):
                 indices['article'] = i
-            elif any(word in cell_lower for word in ['наименование', 'название', 'товар']):
+            elif any(word in cell_lower for word in self.NAME_COLUMN_WORDS):
                 indices['name'] = i
-            elif any(word in cell_lower for word in ['количество', 'кол-во', 'штук']):
+            elif any(word in cell_lower for word in self.QUANTITY_COLUMN_WORDS):
                 indices['quantity'] = i
         
         return indices
@@ -0,0 +1,17 @@
+from modules.table_extractor import TableExtractor
+
+
+def test_article_falls_back_to_next_pattern_after_pure_number():
+    extractor = TableExtractor()
+
+    # Первый паттерн находит число (размер, номер строки) и отбрасывается,
+    # артикул должен найтись следующим паттерном
+    assert extractor._extract_article("Болт 100 мм A001 5 шт") == "A001"
+    assert extractor._extract_article("101 B152-ST Гайка 100 шт") == "B152"
+
+
+def test_extract_from_text_keeps_article_after_leading_number():
+    result = TableExtractor().extract_from_text("Болт 100 мм A001 5 шт")
+
+    assert result["Артикул"] == ["A001"]
+    assert result["Количество"] == ["5 шт"]